@@ -0,0 +1,248 @@
+import os
+import re
+import io
+import csv
+import json
+import hashlib
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from colunas import COLUNAS_EXATAS
+
+# Banco local com os resultados de todos os catálogos processados
+CAMINHO_BANCO = os.getenv("CULTIVARES_DB", "cultivares.db")
+COLUNAS_PROCEDENCIA = ["Documento de origem", "Páginas"]
+
+# Colunas que distinguem linhas de uma mesma chave (no Milho o REC é sempre "NR"
+# e o mesmo produto aparece em várias linhas, uma por UF/Região)
+COLUNAS_VARIANTE = ["UF", "Região"]
+
+# Caminhos cujo esquema já foi criado neste processo
+BANCOS_INICIALIZADOS = set()
+
+def inicializar_banco(caminho):
+    if caminho in BANCOS_INICIALIZADOS:
+        return
+    conexao = sqlite3.connect(caminho, timeout=30)
+    try:
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.executescript("""
+            CREATE TABLE IF NOT EXISTS cultivares (
+                cultura TEXT NOT NULL,
+                nome_produto TEXT NOT NULL,
+                rec TEXT NOT NULL,
+                variante TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                hash_dados TEXT NOT NULL,
+                documento TEXT NOT NULL,
+                paginas TEXT NOT NULL,
+                versao INTEGER NOT NULL,
+                alterado_em TEXT NOT NULL,
+                PRIMARY KEY (cultura, nome_produto, rec, variante)
+            );
+            CREATE INDEX IF NOT EXISTS idx_cultivares_nome ON cultivares (nome_produto COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_cultivares_documento ON cultivares (documento);
+            CREATE INDEX IF NOT EXISTS idx_cultivares_versao ON cultivares (versao);
+            CREATE TABLE IF NOT EXISTS metadados (
+                chave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL
+            );
+        """)
+    finally:
+        conexao.close()
+    BANCOS_INICIALIZADOS.add(caminho)
+
+def conectar_banco(caminho=CAMINHO_BANCO):
+    inicializar_banco(caminho)
+    # isolation_level=None: as transações de escrita são abertas explicitamente
+    return sqlite3.connect(caminho, timeout=30, isolation_level=None)
+
+def chave_linha(linha):
+    variante = "\x1f".join(str(linha.get(col, "NR")) for col in COLUNAS_VARIANTE)
+    return (
+        linha["Cultura"], linha["Nome do produto"], linha["REC"],
+        hashlib.sha1(variante.encode('utf-8')).hexdigest()[:16]
+    )
+
+def mesclar_linhas(antiga, nova):
+    """Mantém os valores da linha antiga onde a nova veio sem informação"""
+    return {col: nova.get(col) if nova.get(col) not in [None, "", "NR"] else antiga.get(col, "NR")
+            for col in COLUNAS_EXATAS}
+
+def valor_csv(valor):
+    valor = "" if valor is None else str(valor).strip()
+    return "" if valor in ["nan", "None", "null", "NaN", "<NA>", "NR"] else valor
+
+def ler_versao_exportada(conexao):
+    resultado = conexao.execute(
+        "SELECT valor FROM metadados WHERE chave = 'ultima_versao_exportada'"
+    ).fetchone()
+    return int(resultado[0]) if resultado else 0
+
+# Função para localizar as páginas onde cada produto aparece
+def localizar_paginas(nomes, textos_paginas, total_paginas):
+    """Dicionário Nome do produto -> páginas em que o nome aparece como palavra inteira"""
+    paginas = {}
+    for nome in nomes:
+        padrao = re.compile(rf"(?<!\w){re.escape(nome.lower())}(?!\w)")
+        encontradas = [str(num) for num, texto in sorted(textos_paginas.items()) if padrao.search(texto.lower())]
+        paginas[nome] = ",".join(encontradas) or f"1-{total_paginas}"
+    return paginas
+
+# Função para gravar (upsert) as linhas de um DataFrame no banco local
+def salvar_no_banco(df, documento, paginas, caminho=CAMINHO_BANCO):
+    """Grava as linhas do documento e retorna (linhas gravadas, linhas removidas)"""
+    if df.empty:
+        return 0, 0
+
+    # Linhas repetidas na mesma chave são mescladas antes de gravar
+    novas = {}
+    for linha in df[COLUNAS_EXATAS].to_dict(orient='records'):
+        chave = chave_linha(linha)
+        novas[chave] = mesclar_linhas(novas[chave], linha) if chave in novas else linha
+
+    conexao = conectar_banco(caminho)
+    try:
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            versao = conexao.execute("SELECT COALESCE(MAX(versao), 0) + 1 FROM cultivares").fetchone()[0]
+            alterado_em = datetime.now().isoformat(timespec='seconds')
+            gravadas = 0
+            for chave, linha in novas.items():
+                existente = conexao.execute(
+                    "SELECT dados, hash_dados FROM cultivares "
+                    "WHERE cultura = ? AND nome_produto = ? AND rec = ? AND variante = ?",
+                    chave
+                ).fetchone()
+                if existente:
+                    linha = mesclar_linhas(json.loads(existente[0]), linha)
+
+                dados = json.dumps(linha, ensure_ascii=False)
+                hash_dados = hashlib.sha1(dados.encode('utf-8')).hexdigest()
+                if existente and existente[1] == hash_dados:
+                    continue
+
+                paginas_linha = paginas.get(linha["Nome do produto"], "") if isinstance(paginas, dict) else paginas
+                conexao.execute("""
+                    INSERT OR REPLACE INTO cultivares
+                        (cultura, nome_produto, rec, variante, dados, hash_dados, documento, paginas, versao, alterado_em)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, chave + (dados, hash_dados, documento, paginas_linha, versao, alterado_em))
+                gravadas += 1
+
+            # Linhas deste documento que a nova extração não produziu mais
+            antigas = conexao.execute(
+                "SELECT cultura, nome_produto, rec, variante FROM cultivares WHERE documento = ?",
+                (documento,)
+            ).fetchall()
+            removidas = [chave for chave in antigas if chave not in novas]
+            conexao.executemany(
+                "DELETE FROM cultivares WHERE cultura = ? AND nome_produto = ? AND rec = ? AND variante = ?",
+                removidas
+            )
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+        return gravadas, len(removidas)
+    finally:
+        conexao.close()
+
+# Função para ler o estado do banco: (versão atual, total de linhas, linhas alteradas
+# desde a última exportação). Versão e total juntos identificam o conteúdo atual
+def estado_banco(caminho=CAMINHO_BANCO):
+    conexao = conectar_banco(caminho)
+    try:
+        versao_atual, total = conexao.execute(
+            "SELECT COALESCE(MAX(versao), 0), COUNT(*) FROM cultivares"
+        ).fetchone()
+        alteradas = conexao.execute(
+            "SELECT COUNT(*) FROM cultivares WHERE versao > ?", (ler_versao_exportada(conexao),)
+        ).fetchone()[0]
+        return versao_atual, total, alteradas
+    finally:
+        conexao.close()
+
+# Função para consultar os catálogos já processados
+def consultar_banco(cultura=None, prefixo="", documento=None, limite=None, caminho=CAMINHO_BANCO):
+    """DataFrame com as COLUNAS_EXATAS e a procedência; `prefixo` filtra o início do nome"""
+    sql = "SELECT dados, documento, paginas, alterado_em, versao FROM cultivares WHERE 1 = 1"
+    parametros = []
+    if cultura:
+        sql += " AND cultura = ?"
+        parametros.append(cultura)
+    if prefixo:
+        sql += " AND nome_produto LIKE ? ESCAPE '\\'"
+        parametros.append(re.sub(r"([\\%_])", r"\\\1", prefixo) + "%")
+    if documento:
+        sql += " AND documento = ?"
+        parametros.append(documento)
+    sql += " ORDER BY cultura, nome_produto, rec"
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+
+    conexao = conectar_banco(caminho)
+    try:
+        resultados = conexao.execute(sql, parametros).fetchall()
+    finally:
+        conexao.close()
+
+    linhas = []
+    for dados, doc, paginas, alterado_em, versao in resultados:
+        linha = json.loads(dados)
+        linha.update({
+            "Documento de origem": doc,
+            "Páginas": paginas,
+            "Atualizado em": alterado_em,
+            "Versão": versao,
+        })
+        linhas.append(linha)
+
+    colunas = COLUNAS_EXATAS + COLUNAS_PROCEDENCIA + ["Atualizado em", "Versão"]
+    return pd.DataFrame(linhas, columns=colunas)
+
+# Função para listar os documentos já gravados no banco
+def listar_documentos_banco(caminho=CAMINHO_BANCO):
+    conexao = conectar_banco(caminho)
+    try:
+        return [doc for (doc,) in conexao.execute("SELECT DISTINCT documento FROM cultivares ORDER BY documento")]
+    finally:
+        conexao.close()
+
+# Função para exportar as linhas alteradas desde a última exportação
+def exportar_alteracoes(caminho=CAMINHO_BANCO):
+    """Gera o CSV (com a procedência) direto do cursor e avança o marcador de exportação"""
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(COLUNAS_EXATAS + COLUNAS_PROCEDENCIA)
+
+    conexao = conectar_banco(caminho)
+    try:
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            versao_exportada = ler_versao_exportada(conexao)
+            maior_versao = versao_exportada
+            for dados, documento, paginas, versao in conexao.execute(
+                "SELECT dados, documento, paginas, versao FROM cultivares WHERE versao > ? "
+                "ORDER BY cultura, nome_produto, rec",
+                (versao_exportada,)
+            ):
+                linha = json.loads(dados)
+                writer.writerow([valor_csv(linha.get(col)) for col in COLUNAS_EXATAS] + [documento, paginas])
+                maior_versao = max(maior_versao, versao)
+
+            conexao.execute(
+                "INSERT OR REPLACE INTO metadados (chave, valor) VALUES ('ultima_versao_exportada', ?)",
+                (str(maior_versao),)
+            )
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+    finally:
+        conexao.close()
+
+    return output.getvalue()
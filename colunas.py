@@ -0,0 +1,40 @@
+# Criar lista de meses detalhados
+meses_detalhados = []
+for mes in ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
+            "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]:
+    for num in ["1", "2", "3"]:
+        meses_detalhados.append(f"{mes} {num}")
+
+# COLUNAS EXATAS conforme o template
+COLUNAS_EXATAS = [
+    "Cultura", "Nome do produto", "NOME TÉCNICO/ REG", "Descritivo para SEO", 
+    "Fertilidade", "Grupo de maturação", "Lançamento", "Slogan", "Tecnologia", 
+    "Região (por extenso)", "Estado (por extenso)", "Ciclo", "Finalidade", 
+    "URL da imagem do mapa", "Número do ícone 1", "Titulo icone 1", "Descrição Icone 1", 
+    "Número do ícone 2", "Titulo icone 2", "Descrição Icone 2", "Número do ícone 3", 
+    "Titulo icone 3", "Descrição Icone 3", "Número do ícone 4", "Título icone 4", 
+    "Descrição Icone 4", "Número do ícone 5", "Título icone 5", "Descrição Icone 5", 
+    "Exigência à fertilidade", "Grupo de maturidade", "PMS MÉDIO", "Tipo de crescimento", 
+    "Cor da flor", "Cor da pubescência", "Cor do hilo", "Cancro da haste", 
+    "Pústula bacteriana ", "Nematoide das galhas - M. javanica", 
+    "Nematóide de Cisto (Raça 3)", "Nematóide de Cisto (Raça 9)", 
+    "Nematóide de Cisto (Raça 10)", "Nematóide de Cisto (Raça 14)", 
+    "Fitóftora (Raça 1)", "Recomendações", "Resultado 1 - Nome", "Resultado 1 - Local", 
+    "Resultado 1", "Resultado 2 - Nome", "Resultado 2 - Local", "Resultado 2", 
+    "Resultado 3 - Nome", "Resultado 3 - Local", "Resultado 3", "Resultado 4 - Nome", 
+    "Resultado 4 - Local", "Resultado 4", "Resultado 5 - Nome", "Resultado 5 - Lcal", 
+    "Resultado 5", "Resultado 6 - Nome", "Resultado 6 - Local", "Resultado 6", 
+    "Resultado 7 - Nome", "Resultado 7 - Local", "Resultado 7", "REC", "UF", 
+    "Região"
+] + meses_detalhados
+
+# Colunas de baixa cardinalidade armazenadas como category no DataFrame compacto
+COLUNAS_CATEGORICAS = [
+    "Cultura", "Grupo de maturação", "Lançamento", "Tecnologia", "Região (por extenso)",
+    "Estado (por extenso)", "Ciclo", "Finalidade", "Exigência à fertilidade",
+    "Grupo de maturidade", "Tipo de crescimento", "Cor da flor", "Cor da pubescência",
+    "Cor do hilo", "Cancro da haste", "Pústula bacteriana ",
+    "Nematoide das galhas - M. javanica", "Nematóide de Cisto (Raça 3)",
+    "Nematóide de Cisto (Raça 9)", "Nematóide de Cisto (Raça 10)",
+    "Nematóide de Cisto (Raça 14)", "Fitóftora (Raça 1)", "REC", "UF", "Região"
+] + meses_detalhados
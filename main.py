@@ -8,9 +8,22 @@ import io
 import csv
 import json
 import re
+import time
+import sys
+import sqlite3
 from PIL import Image, ImageDraw, ImageFont
 import fitz  # PyMuPDF
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from colunas import meses_detalhados, COLUNAS_EXATAS, COLUNAS_CATEGORICAS
+from banco import (
+    COLUNAS_PROCEDENCIA, localizar_paginas, salvar_no_banco, estado_banco,
+    consultar_banco, listar_documentos_banco, exportar_alteracoes
+)
+from roteamento import (
+    ROTEAMENTO, pagina_simples, extracao_simples, gerar_com_roteamento, registrar_metrica_modelo, mesclar_metricas,
+    validar_transcricao, carregar_json_estrito, validar_registros
+)
 
 # Configuração
 st.set_page_config(page_title="Extrator de Cultivares", page_icon="🌱")
@@ -22,55 +35,51 @@ if not gemini_api_key:
     st.error("Configure GEMINI_API_KEY")
     st.stop()
 
+# Função para criar os modelos do roteamento
+def criar_modelos(configuracao=ROTEAMENTO):
+    return {
+        "rapido": genai.GenerativeModel(configuracao["modelo_rapido"]),
+        "forte": genai.GenerativeModel(configuracao["modelo_forte"]),
+    }
+
 try:
     genai.configure(api_key=gemini_api_key)
-    modelo_visao = genai.GenerativeModel("gemini-2.5-flash")
-    modelo_texto = genai.GenerativeModel("gemini-2.5-flash")
+    MODELOS = criar_modelos()
 except Exception as e:
     st.error(f"Erro ao configurar Gemini: {str(e)}")
     st.stop()
 
-# Criar lista de meses detalhados
-meses_detalhados = []
-for mes in ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", 
-            "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]:
-    for num in ["1", "2", "3"]:
-        meses_detalhados.append(f"{mes} {num}")
-
-# COLUNAS EXATAS conforme o template
-COLUNAS_EXATAS = [
-    "Cultura", "Nome do produto", "NOME TÉCNICO/ REG", "Descritivo para SEO", 
-    "Fertilidade", "Grupo de maturação", "Lançamento", "Slogan", "Tecnologia", 
-    "Região (por extenso)", "Estado (por extenso)", "Ciclo", "Finalidade", 
-    "URL da imagem do mapa", "Número do ícone 1", "Titulo icone 1", "Descrição Icone 1", 
-    "Número do ícone 2", "Titulo icone 2", "Descrição Icone 2", "Número do ícone 3", 
-    "Titulo icone 3", "Descrição Icone 3", "Número do ícone 4", "Título icone 4", 
-    "Descrição Icone 4", "Número do ícone 5", "Título icone 5", "Descrição Icone 5", 
-    "Exigência à fertilidade", "Grupo de maturidade", "PMS MÉDIO", "Tipo de crescimento", 
-    "Cor da flor", "Cor da pubescência", "Cor do hilo", "Cancro da haste", 
-    "Pústula bacteriana ", "Nematoide das galhas - M. javanica", 
-    "Nematóide de Cisto (Raça 3)", "Nematóide de Cisto (Raça 9)", 
-    "Nematóide de Cisto (Raça 10)", "Nematóide de Cisto (Raça 14)", 
-    "Fitóftora (Raça 1)", "Recomendações", "Resultado 1 - Nome", "Resultado 1 - Local", 
-    "Resultado 1", "Resultado 2 - Nome", "Resultado 2 - Local", "Resultado 2", 
-    "Resultado 3 - Nome", "Resultado 3 - Local", "Resultado 3", "Resultado 4 - Nome", 
-    "Resultado 4 - Local", "Resultado 4", "Resultado 5 - Nome", "Resultado 5 - Lcal", 
-    "Resultado 5", "Resultado 6 - Nome", "Resultado 6 - Local", "Resultado 6", 
-    "Resultado 7 - Nome", "Resultado 7 - Local", "Resultado 7", "REC", "UF", 
-    "Região"
-] + meses_detalhados
-
 # Session state
 if 'df' not in st.session_state:
     st.session_state.df = pd.DataFrame(columns=COLUNAS_EXATAS)
-if 'csv_content' not in st.session_state:
-    st.session_state.csv_content = ""
 if 'texto_transcrito' not in st.session_state:
     st.session_state.texto_transcrito = ""
-if 'imagens_paginas' not in st.session_state:
-    st.session_state.imagens_paginas = []
 if 'tipo_cultura' not in st.session_state:
     st.session_state.tipo_cultura = "Milho"
+if 'metricas_modelos' not in st.session_state:
+    st.session_state.metricas_modelos = {}
+
+# Função para estimar a densidade de conteúdo de uma página
+def densidade_pagina(imagem):
+    """Fração de pixels escuros da página (tabelas e figuras elevam o valor)"""
+    miniatura = imagem.convert("L")
+    miniatura.thumbnail((200, 200))
+    pixels = np.asarray(miniatura)
+    return float((pixels < 200).mean())
+
+# Função para montar a tabela de métricas de roteamento
+def resumo_metricas_modelos():
+    linhas = []
+    for nome_modelo, metricas in st.session_state.metricas_modelos.items():
+        chamadas = metricas["chamadas"]
+        linhas.append({
+            "Modelo": nome_modelo,
+            "Chamadas": chamadas,
+            "Latência média (s)": round(metricas["tempo_total"] / chamadas, 2) if chamadas else 0.0,
+            "Escalonamentos": metricas["escalonamentos"],
+            "Taxa de escalonamento": f"{metricas['escalonamentos'] / chamadas:.0%}" if chamadas else "0%",
+        })
+    return pd.DataFrame(linhas)
 
 # Função para converter PDF para imagens
 def pdf_para_imagens(pdf_bytes):
@@ -122,7 +131,8 @@ def pdf_para_imagens(pdf_bytes):
         return []
 
 # Função para processar imagens em lote
-def processar_imagens_em_lote(imagens, batch_size=3):
+def processar_imagens_em_lote(imagens, batch_size=3, ao_transcrever_pagina=None, ao_concluir_lote=None):
+    """Os callbacks recebem cada página e cada lote assim que ficam prontos"""
     if not imagens:
         return ""
     
@@ -137,6 +147,7 @@ def processar_imagens_em_lote(imagens, batch_size=3):
         batch_imagens = imagens[batch_start:batch_end]
         
         status_text.text(f"Processando páginas {batch_start + 1} a {batch_end} de {total_paginas}...")
+        texto_lote = ""
         
         for idx, imagem in enumerate(batch_imagens):
             pagina_num = batch_start + idx + 1
@@ -171,22 +182,29 @@ def processar_imagens_em_lote(imagens, batch_size=3):
                 
                 Retorne APENAS o texto transcrito."""
                 
-                response = modelo_visao.generate_content([
-                    prompt,
-                    {"mime_type": "image/png", "data": img_bytes}
-                ])
+                texto_pagina, _ = gerar_com_roteamento(
+                    [prompt, {"mime_type": "image/png", "data": img_bytes}],
+                    simples=pagina_simples(densidade_pagina(imagem)),
+                    modelos=MODELOS,
+                    metricas=st.session_state.metricas_modelos,
+                    validar=validar_transcricao
+                )
                 
-                texto_pagina = response.text.strip()
-                texto_completo += f"\n\n--- PÁGINA {pagina_num} ---\n{texto_pagina}\n"
+                bloco_pagina = f"\n\n--- PÁGINA {pagina_num} ---\n{texto_pagina}\n"
+                texto_completo += bloco_pagina
+                texto_lote += bloco_pagina
+                if ao_transcrever_pagina:
+                    ao_transcrever_pagina(pagina_num, texto_pagina)
                 
-                import time
                 time.sleep(1)
                 
             except Exception as e:
                 texto_completo += f"\n\n--- ERRO PÁGINA {pagina_num}: {str(e)[:100]} ---\n"
                 continue
         
-        import time
+        if ao_concluir_lote and texto_lote:
+            ao_concluir_lote(texto_lote, batch_start + 1, batch_end)
+        
         if batch_end < total_paginas:
             time.sleep(3)
     
@@ -324,6 +342,17 @@ def criar_prompt_para_cultura(texto_transcrito, tipo_cultura):
     
     return prompt_base
 
+# Função para extração provisória de um lote de páginas
+def extrair_lote_provisorio(texto_lote, tipo_cultura, metricas):
+    """Roda em thread de fundo (sem Streamlit) e usa sempre o modelo rápido"""
+    modelo = MODELOS["rapido"]
+    inicio = time.perf_counter()
+    try:
+        resposta = modelo.generate_content(criar_prompt_para_cultura(texto_lote, tipo_cultura)).text
+    finally:
+        registrar_metrica_modelo(metricas, getattr(modelo, "model_name", "rapido"), time.perf_counter() - inicio)
+    return carregar_json_estrito(resposta) or []
+
 # Função para extrair dados
 def extrair_dados_para_csv(texto_transcrito, tipo_cultura):
     # Criar prompt específico para o tipo de cultura
@@ -337,8 +366,16 @@ def extrair_dados_para_csv(texto_transcrito, tipo_cultura):
         else:
             texto_para_analise = texto_transcrito
         
-        response = modelo_texto.generate_content(prompt)
-        resposta = response.text.strip()
+        simples = extracao_simples(texto_transcrito)
+        resposta, nivel = gerar_com_roteamento(
+            prompt,
+            simples=simples,
+            modelos=MODELOS,
+            metricas=st.session_state.metricas_modelos,
+            validar=lambda texto: validar_registros(carregar_json_estrito(texto), meses_detalhados)
+        )
+        if nivel == "forte" and simples:
+            st.info(f"🔁 Extração de {tipo_cultura} refeita no modelo {ROTEAMENTO['modelo_forte']} após falha na validação")
         
         # Limpar resposta
         resposta_limpa = resposta.replace('```json', '').replace('```', '').replace('JSON', '').strip()
@@ -461,20 +498,67 @@ def criar_dataframe(dados, tipo_cultura):
         # Ordenar colunas
         df = df[COLUNAS_EXATAS]
         
-        # Ordenar por Nome do produto e REC (se houver)
-        colunas_ordenacao = ['Nome do produto'] if 'Nome do produto' in df.columns else []
-        if 'REC' in df.columns and tipo_cultura == "Soja":
-            colunas_ordenacao.append('REC')
-        
-        if colunas_ordenacao:
-            df = df.sort_values(colunas_ordenacao).reset_index(drop=True)
-        
-        return df
+        return ordenar_dataframe(df, tipo_cultura)
     else:
         return pd.DataFrame(columns=COLUNAS_EXATAS)
 
+# Função para ordenar por Nome do produto e REC (se houver)
+def ordenar_dataframe(df, tipo_cultura):
+    colunas_ordenacao = ['Nome do produto'] if 'Nome do produto' in df.columns else []
+    if 'REC' in df.columns and tipo_cultura == "Soja":
+        colunas_ordenacao.append('REC')
+    
+    if colunas_ordenacao:
+        df = df.sort_values(colunas_ordenacao).reset_index(drop=True)
+    
+    return df
+
+# Função para identificar colunas com dados
+def mascara_colunas_com_dados(df):
+    """Série booleana por coluna: True se houver algum valor diferente de vazio/NR"""
+    if df.empty:
+        return pd.Series(False, index=COLUNAS_EXATAS)
+    
+    valores = df.reindex(columns=COLUNAS_EXATAS).astype(object).fillna("").to_numpy(dtype=str)
+    valores = np.char.strip(valores)
+    preenchidas = ~np.isin(valores, ["", "NR", "nan"])
+    return pd.Series(preenchidas.any(axis=0), index=COLUNAS_EXATAS)
+
+# Função para compactar o DataFrame guardado na sessão
+def compactar_dataframe(df):
+    """Troca "NR"/"" por nulos e usa category nas colunas de baixa cardinalidade"""
+    df = df.mask(df.isin(["NR", ""]))
+    colunas = [col for col in COLUNAS_CATEGORICAS if col in df.columns]
+    df[colunas] = df[colunas].astype("category")
+    return df
+
+def memoria_dataframe(df):
+    return int(df.memory_usage(deep=True).sum())
+
+# Funções para estimar a memória ocupada pelo estado da sessão
+def memoria_valor(valor):
+    if isinstance(valor, pd.DataFrame):
+        return memoria_dataframe(valor)
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, Image.Image):
+        return valor.width * valor.height * len(valor.getbands())
+    if isinstance(valor, (list, tuple)):
+        return sys.getsizeof(valor) + sum(memoria_valor(item) for item in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(memoria_valor(k) + memoria_valor(v) for k, v in valor.items())
+    return sys.getsizeof(valor)
+
+def memoria_sessao():
+    return sum(memoria_valor(valor) for valor in st.session_state.to_dict().values())
+
+# Função para gerar JSON (nulos voltam a ser "NR", como na extração)
+def gerar_json(df):
+    df = df.astype(object).where(df.notna(), "NR")
+    return df.to_json(orient='records', indent=2, force_ascii=False)
+
 # Função para gerar CSV
-def gerar_csv_para_gsheets(df):
+def gerar_csv_para_gsheets(df, colunas=COLUNAS_EXATAS):
     if df.empty:
         return ""
     
@@ -482,12 +566,12 @@ def gerar_csv_para_gsheets(df):
     writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
     
     # Escrever cabeçalho
-    writer.writerow(COLUNAS_EXATAS)
+    writer.writerow(colunas)
     
     # Escrever dados
     for _, row in df.iterrows():
         linha = []
-        for col in COLUNAS_EXATAS:
+        for col in colunas:
             valor = row.get(col)
             if pd.isna(valor) or valor is None:
                 valor = ""
@@ -504,6 +588,65 @@ def gerar_csv_para_gsheets(df):
     
     return output.getvalue()
 
+# Consultas ao banco local em cache, limitadas para não crescer sem fim; o estado
+# do banco (versão e total de linhas) entra na chave e invalida o cache
+@st.cache_data(show_spinner=False, max_entries=16, ttl=600)
+def consultar_banco_em_cache(cultura, prefixo, documento, estado):
+    return consultar_banco(cultura, prefixo, documento, limite=1000)
+
+@st.cache_data(show_spinner=False, max_entries=4, ttl=600)
+def listar_documentos_em_cache(estado):
+    return listar_documentos_banco()
+
+# Consulta aos catálogos processados anteriormente
+def mostrar_consulta_banco():
+    st.markdown("---")
+    st.markdown("### 🗄️ Catálogos processados")
+    
+    with st.expander("🔎 Consultar cultivares de todos os catálogos"):
+        try:
+            versao_atual, total, alteradas = estado_banco()
+            estado = (versao_atual, total)
+            
+            with st.form("consulta_banco"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    cultura = st.selectbox("Cultura:", ["Todas", "Milho", "Soja"])
+                with col2:
+                    prefixo = st.text_input("Nome do produto começa com:")
+                with col3:
+                    documento = st.selectbox("Documento:", ["Todos"] + listar_documentos_em_cache(estado))
+                if st.form_submit_button("Consultar"):
+                    st.session_state.filtros_banco = (
+                        None if cultura == "Todas" else cultura,
+                        prefixo.strip(),
+                        None if documento == "Todos" else documento
+                    )
+            
+            # A consulta só roda depois do primeiro envio e fica em cache até o banco mudar
+            if st.session_state.get("filtros_banco"):
+                cultura, prefixo, documento = st.session_state.filtros_banco
+                df = consultar_banco_em_cache(cultura, prefixo, documento, estado)
+                st.caption(f"{len(df)} linha(s) encontrada(s) (máximo de 1000)")
+                if not df.empty:
+                    mascara = mascara_colunas_com_dados(df)
+                    colunas = mascara.index[mascara].tolist() + COLUNAS_PROCEDENCIA + ["Atualizado em"]
+                    st.dataframe(df[colunas], use_container_width=True, height=400)
+            
+            # Exportação incremental: só as linhas alteradas desde a última exportação
+            if alteradas == 0:
+                st.info("Nenhuma linha alterada desde a última exportação")
+            else:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                st.download_button(
+                    label=f"⬇️ Exportar {alteradas} linha(s) alterada(s)",
+                    data=lambda: exportar_alteracoes().encode('utf-8'),
+                    file_name=f"cultivares_alteracoes_{timestamp}.csv",
+                    mime="text/csv"
+                )
+        except sqlite3.Error as e:
+            st.warning(f"⚠️ Banco local indisponível: {str(e)}")
+
 # Interface principal
 def main():
     st.markdown("### 📤 Carregue um arquivo PDF com informações de cultivares")
@@ -541,9 +684,8 @@ def main():
         with col2:
             if st.button("🗑️ Limpar tudo", use_container_width=True):
                 st.session_state.df = pd.DataFrame(columns=COLUNAS_EXATAS)
-                st.session_state.csv_content = ""
                 st.session_state.texto_transcrito = ""
-                st.session_state.imagens_paginas = []
+                st.session_state.metricas_modelos = {}
                 st.rerun()
         
         # Campo para colar texto transcrito manualmente
@@ -557,9 +699,8 @@ def main():
             with st.spinner("Processando..."):
                 # Limpar estado anterior
                 st.session_state.df = pd.DataFrame(columns=COLUNAS_EXATAS)
-                st.session_state.csv_content = ""
                 st.session_state.texto_transcrito = ""
-                st.session_state.imagens_paginas = []
+                st.session_state.metricas_modelos = {}
                 
                 try:
                     # PASSO 1: Converter PDF para imagens
@@ -568,70 +709,157 @@ def main():
                         if not imagens:
                             st.error("❌ Falha ao converter PDF")
                             return
-                        st.session_state.imagens_paginas = imagens
+                        total_paginas = len(imagens)
                     
-                    # PASSO 2: Transcrever imagens
-                    with st.spinner("🤖 Transcrevendo texto das páginas..."):
-                        texto_completo = processar_imagens_em_lote(imagens, batch_size=2)
-                        if texto_completo:
-                            st.session_state.texto_transcrito = texto_completo
-                            st.success(f"✅ Transcrição concluída para {tipo_cultura}")
+                    # PASSO 2: Transcrever as páginas. Cada lote concluído (exceto o
+                    # último, coberto pela extração final) recebe uma extração provisória
+                    # em segundo plano para mostrar linhas enquanto o documento avança
+                    st.markdown("### ⏳ Resultados parciais")
+                    area_paginas = st.container()
+                    area_provisoria = st.empty()
+                    with area_provisoria.container():
+                        resumo_parcial = st.empty()
+                        espaco_tabela = st.empty()
+                    
+                    executor = ThreadPoolExecutor(max_workers=2)
+                    pendentes = []
+                    textos_paginas = {}
+                    provisorio = {
+                        "partes": [],
+                        "mascara": pd.Series(False, index=COLUNAS_EXATAS),
+                        "tabela": None,
+                    }
+                    
+                    def coletar_provisorios():
+                        for futuro, metricas_lote in [p for p in pendentes if p[0].done()]:
+                            pendentes.remove((futuro, metricas_lote))
+                            mesclar_metricas(st.session_state.metricas_modelos, metricas_lote, " (provisório)")
+                            if futuro.cancelled() or futuro.exception():
+                                continue
+                            df_lote = criar_dataframe(futuro.result(), tipo_cultura)
+                            if df_lote.empty:
+                                continue
+                            
+                            df_lote.index += sum(len(parte) for parte in provisorio["partes"])
+                            provisorio["partes"].append(df_lote)
+                            mascara = provisorio["mascara"] | mascara_colunas_com_dados(df_lote)
+                            colunas = mascara.index[mascara].tolist()
                             
-                            # Mostrar amostra do texto
-                            with st.expander("📝 Ver texto transcrito (amostra)"):
-                                st.text_area("Texto:", texto_completo[:3000], height=300)
-                        else:
-                            st.error("❌ Falha na transcrição")
+                            # Anexar à tabela exibida; ela só é redesenhada quando surge
+                            # uma coluna com dados que ainda não estava visível
+                            if provisorio["tabela"] is not None and mascara.equals(provisorio["mascara"]):
+                                provisorio["tabela"].add_rows(df_lote[colunas])
+                            else:
+                                provisorio["tabela"] = espaco_tabela.dataframe(
+                                    pd.concat(provisorio["partes"])[colunas], use_container_width=True, height=300
+                                )
+                            provisorio["mascara"] = mascara
+                            resumo_parcial.caption(
+                                f"{sum(len(parte) for parte in provisorio['partes'])} linha(s) provisória(s) · "
+                                f"{len(colunas)} coluna(s) com dados · "
+                                "a tabela final é extraída do documento inteiro"
+                            )
+                    
+                    def mostrar_pagina(pagina_num, texto_pagina):
+                        textos_paginas[pagina_num] = texto_pagina.lower()
+                        with area_paginas.expander(f"📝 Página {pagina_num} transcrita"):
+                            st.text(texto_pagina[:3000])
+                        coletar_provisorios()
+                    
+                    def extrair_lote(texto_lote, pagina_inicial, pagina_final):
+                        if pagina_final == total_paginas:
                             return
+                        # Cada tarefa acumula métricas no próprio dicionário; a thread
+                        # principal as mescla na sessão quando a tarefa termina
+                        metricas_lote = {}
+                        futuro = executor.submit(extrair_lote_provisorio, texto_lote, tipo_cultura, metricas_lote)
+                        pendentes.append((futuro, metricas_lote))
+                    
+                    try:
+                        with st.spinner(f"🤖 Transcrevendo páginas de {tipo_cultura}..."):
+                            texto_completo = processar_imagens_em_lote(
+                                imagens,
+                                batch_size=2,
+                                ao_transcrever_pagina=mostrar_pagina,
+                                ao_concluir_lote=extrair_lote
+                            )
+                    finally:
+                        coletar_provisorios()
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    
+                    # As imagens das páginas (zoom 4) são o maior custo de memória e não
+                    # são usadas depois da transcrição: liberar em vez de guardar na sessão
+                    memoria_imagens = memoria_valor(imagens)
+                    imagens.clear()
+                    
+                    if texto_completo:
+                        st.session_state.texto_transcrito = texto_completo
+                        st.success(f"✅ Transcrição concluída para {tipo_cultura}")
+                    else:
+                        st.error("❌ Falha na transcrição")
+                        return
                     
-                    # PASSO 3: Extrair dados
-                    with st.spinner(f"📊 Extraindo dados para {tipo_cultura}..."):
+                    # PASSO 3: Extração final sobre o documento inteiro (as informações
+                    # de uma cultivar podem estar espalhadas por vários lotes)
+                    with st.spinner(f"📊 Extraindo dados do documento para {tipo_cultura}..."):
                         dados = extrair_dados_para_csv(texto_completo, tipo_cultura)
+                        df = criar_dataframe(dados, tipo_cultura)
+                    area_provisoria.empty()
+                    
+                    if not df.empty:
+                        try:
+                            gravadas, removidas = salvar_no_banco(
+                                df, uploaded_file.name,
+                                localizar_paginas(df['Nome do produto'].unique(), textos_paginas, total_paginas)
+                            )
+                            st.caption(
+                                f"🗄️ Banco local: {gravadas} linha(s) nova(s) ou alterada(s), "
+                                f"{removidas} linha(s) antiga(s) deste documento removida(s)"
+                            )
+                        except sqlite3.Error as e:
+                            st.warning(f"⚠️ Não foi possível gravar no banco local: {str(e)}")
                         
-                        if dados:
-                            st.info(f"ℹ️ {len(dados)} registro(s) encontrado(s)")
-                            
-                            # Criar DataFrame
-                            df = criar_dataframe(dados, tipo_cultura)
-                            st.session_state.df = df
-                            
-                            if not df.empty:
-                                # Gerar CSV
-                                csv_content = gerar_csv_para_gsheets(df)
-                                st.session_state.csv_content = csv_content
-                                st.success(f"✅ {len(df)} linha(s) extraída(s) com sucesso!")
-                                
-                                # Mostrar estatísticas
-                                st.markdown("### 📊 Estatísticas:")
-                                col1, col2, col3, col4 = st.columns(4)
-                                with col1:
-                                    st.metric("Linhas", len(df))
-                                with col2:
-                                    if 'Cultura' in df.columns:
-                                        st.metric("Cultura", tipo_cultura)
-                                with col3:
-                                    if 'Nome do produto' in df.columns:
-                                        produtos = df['Nome do produto'].unique()
-                                        st.metric("Produtos", len(produtos))
-                                with col4:
-                                    if 'REC' in df.columns:
-                                        if tipo_cultura == "Soja":
-                                            recs_validos = sum([1 for val in df['REC'] if str(val).strip() not in ['', 'NR']])
-                                            st.metric("RECs", recs_validos)
-                                        else:
-                                            st.metric("RECs", "NR (Milho)")
-                                
-                                # Mostrar amostra dos dados
-                                with st.expander("👀 Visualizar amostra dos dados"):
-                                    st.dataframe(df.head(), use_container_width=True)
-                            else:
-                                st.warning("⚠️ DataFrame vazio após processamento")
-                        else:
-                            st.warning("⚠️ Nenhum dado estruturado encontrado no texto")
+                        # Guardar na sessão a versão compacta (CSV/JSON são gerados sob demanda)
+                        memoria_antes = memoria_dataframe(df)
+                        df = compactar_dataframe(df)
+                        st.session_state.df = df
+                        st.success(f"✅ {len(df)} linha(s) extraída(s) com sucesso!")
+                        st.caption(
+                            f"Memória da sessão: {memoria_sessao() / 1024:.0f} KB "
+                            f"(tabela: {memoria_antes / 1024:.0f} KB → {memoria_dataframe(df) / 1024:.0f} KB; "
+                            f"{memoria_imagens / 1024 ** 2:.0f} MB de imagens das páginas liberados)"
+                        )
+                        
+                        # Mostrar estatísticas
+                        st.markdown("### 📊 Estatísticas:")
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("Linhas", len(df))
+                        with col2:
+                            if 'Cultura' in df.columns:
+                                st.metric("Cultura", tipo_cultura)
+                        with col3:
+                            if 'Nome do produto' in df.columns:
+                                produtos = df['Nome do produto'].unique()
+                                st.metric("Produtos", len(produtos))
+                        with col4:
+                            if 'REC' in df.columns:
+                                if tipo_cultura == "Soja":
+                                    recs_validos = int(df['REC'].notna().sum())
+                                    st.metric("RECs", recs_validos)
+                                else:
+                                    st.metric("RECs", "NR (Milho)")
+                    else:
+                        st.warning("⚠️ Nenhum dado estruturado encontrado no texto")
                 
                 except Exception as e:
                     st.error(f"❌ Erro no processamento: {str(e)}")
         
+        # Métricas de roteamento de modelos
+        if st.session_state.metricas_modelos:
+            with st.expander("⏱️ Latência e escalonamento por modelo"):
+                st.dataframe(resumo_metricas_modelos(), use_container_width=True, hide_index=True)
+        
         # Mostrar resultados se existirem
         df = st.session_state.df
         
@@ -642,14 +870,9 @@ def main():
             # Mostrar DataFrame completo
             st.markdown("### 📊 Tabela Completa de Dados")
             
-            # Filtrar colunas com dados
-            colunas_com_dados = []
-            for col in COLUNAS_EXATAS:
-                if col in df.columns:
-                    valores_unicos = df[col].dropna().unique()
-                    valores_validos = [v for v in valores_unicos if str(v).strip() not in ['', 'NR', 'nan']]
-                    if valores_validos:
-                        colunas_com_dados.append(col)
+            # Filtrar colunas com dados (máscara vetorizada sobre a tabela compacta)
+            mascara = mascara_colunas_com_dados(df)
+            colunas_com_dados = mascara.index[mascara].tolist()
             
             if len(colunas_com_dados) < len(COLUNAS_EXATAS):
                 st.info(f"Mostrando {len(colunas_com_dados)} colunas com dados")
@@ -660,11 +883,11 @@ def main():
             # Verificação especial para REC
             if tipo_cultura == "Milho":
                 if 'REC' in df.columns:
-                    recs = df['REC'].unique()
-                    if len(recs) == 1 and recs[0] == "NR":
+                    recs = df['REC'].dropna().unique()
+                    if len(recs) == 0:
                         st.success("✅ Coluna REC corretamente definida como 'NR' para Milho")
                     else:
-                        st.warning(f"⚠️ Atenção: REC encontrados para Milho: {recs}")
+                        st.warning(f"⚠️ Atenção: REC encontrados para Milho: {list(recs)}")
             
             # Download
             st.markdown("---")
@@ -673,28 +896,26 @@ def main():
             nome_base = uploaded_file.name.split('.')[0]
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
-            if st.session_state.csv_content:
-                col_dl1, col_dl2 = st.columns(2)
-                
-                with col_dl1:
-                    st.download_button(
-                        label="⬇️ Baixar CSV",
-                        data=st.session_state.csv_content.encode('utf-8'),
-                        file_name=f"{tipo_cultura.lower()}_cultivares_{nome_base}_{timestamp}.csv",
-                        mime="text/csv",
-                        type="primary",
-                        use_container_width=True
-                    )
-                
-                with col_dl2:
-                    json_data = df.to_json(orient='records', indent=2, force_ascii=False)
-                    st.download_button(
-                        label="⬇️ Baixar JSON",
-                        data=json_data.encode('utf-8'),
-                        file_name=f"{tipo_cultura.lower()}_cultivares_{nome_base}_{timestamp}.json",
-                        mime="application/json",
-                        use_container_width=True
-                    )
+            col_dl1, col_dl2 = st.columns(2)
+            
+            with col_dl1:
+                st.download_button(
+                    label="⬇️ Baixar CSV",
+                    data=lambda: gerar_csv_para_gsheets(df).encode('utf-8'),
+                    file_name=f"{tipo_cultura.lower()}_cultivares_{nome_base}_{timestamp}.csv",
+                    mime="text/csv",
+                    type="primary",
+                    use_container_width=True
+                )
+            
+            with col_dl2:
+                st.download_button(
+                    label="⬇️ Baixar JSON",
+                    data=lambda: gerar_json(df).encode('utf-8'),
+                    file_name=f"{tipo_cultura.lower()}_cultivares_{nome_base}_{timestamp}.json",
+                    mime="application/json",
+                    use_container_width=True
+                )
         
         elif st.session_state.texto_transcrito:
             st.info("📝 Texto transcrito disponível, mas nenhum dado estruturado foi extraído.")
@@ -715,6 +936,7 @@ def main():
             4. **Transcrição**: IA extrai texto das imagens
             5. **Extração**: IA identifica dados nas {len(COLUNAS_EXATAS)} colunas
             6. **Download**: CSV e JSON disponíveis
+            7. **Banco local**: cada linha é gravada por Cultura + Nome do produto + REC e pode ser consultada depois em "Catálogos processados"
             
             ### 🔍 Diferenças por cultura:
             
@@ -738,3 +960,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    mostrar_consulta_banco()
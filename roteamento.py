@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import time
+
+# Roteamento de modelos: páginas simples e extrações pequenas vão primeiro para o
+# modelo rápido; o resultado só é refeito no modelo forte se falhar na validação local
+ROTEAMENTO = {
+    "modelo_rapido": os.getenv("GEMINI_MODELO_RAPIDO", "gemini-2.5-flash-lite"),
+    "modelo_forte": os.getenv("GEMINI_MODELO_FORTE", "gemini-2.5-flash"),
+    # Fração máxima de pixels escuros para uma página ser considerada simples
+    "densidade_maxima_rapido": float(os.getenv("ROTEAMENTO_DENSIDADE_MAX", "0.08")),
+    # Tamanho máximo do texto transcrito para a extração ir ao modelo rápido
+    "caracteres_maximos_rapido": int(os.getenv("ROTEAMENTO_CARACTERES_MAX", "6000")),
+}
+
+# Valores aceitos nas colunas de meses (ex: "60", "55-60", "75 - 82")
+PADRAO_VALOR_MES = re.compile(r"^\d{1,3}(\s*[-–]\s*\d{1,3})?$")
+
+# Funções da política de roteamento
+def pagina_simples(densidade, configuracao=ROTEAMENTO):
+    return densidade <= configuracao["densidade_maxima_rapido"]
+
+def extracao_simples(texto, configuracao=ROTEAMENTO):
+    return len(texto) <= configuracao["caracteres_maximos_rapido"]
+
+# Função para registrar latência e escalonamentos por modelo
+def registrar_metrica_modelo(metricas, nome_modelo, latencia, escalonado=False):
+    metricas_modelo = metricas.setdefault(
+        nome_modelo, {"chamadas": 0, "tempo_total": 0.0, "escalonamentos": 0}
+    )
+    metricas_modelo["chamadas"] += 1
+    metricas_modelo["tempo_total"] += latencia
+    if escalonado:
+        metricas_modelo["escalonamentos"] += 1
+
+# Função para somar métricas de outro dicionário (ex: de uma thread de fundo)
+def mesclar_metricas(destino, origem, sufixo=""):
+    for nome_modelo, valores in origem.items():
+        metricas_modelo = destino.setdefault(
+            nome_modelo + sufixo, {"chamadas": 0, "tempo_total": 0.0, "escalonamentos": 0}
+        )
+        for campo, valor in valores.items():
+            metricas_modelo[campo] += valor
+
+# Função para gerar conteúdo com roteamento entre modelo rápido e forte
+def gerar_com_roteamento(conteudo, simples, modelos, metricas=None, validar=None):
+    """Retorna (texto, nível usado); `modelos` aceita qualquer objeto com generate_content"""
+    metricas = {} if metricas is None else metricas
+    nivel = "rapido" if simples else "forte"
+
+    while True:
+        modelo = modelos[nivel]
+        nome_modelo = getattr(modelo, "model_name", nivel)
+        inicio = time.perf_counter()
+        try:
+            texto = modelo.generate_content(conteudo).text.strip()
+            problemas = validar(texto) if validar else []
+        except Exception as e:
+            if nivel == "forte":
+                registrar_metrica_modelo(metricas, nome_modelo, time.perf_counter() - inicio)
+                raise
+            problemas = [f"erro do modelo: {str(e)[:100]}"]
+
+        escalonar = bool(problemas) and nivel == "rapido"
+        registrar_metrica_modelo(metricas, nome_modelo, time.perf_counter() - inicio, escalonado=escalonar)
+        if not escalonar:
+            return texto, nivel
+        nivel = "forte"
+
+# Função para validar a transcrição de uma página
+def validar_transcricao(texto):
+    return [] if texto else ["transcrição vazia"]
+
+# Função para carregar JSON estrito da resposta do modelo
+def carregar_json_estrito(resposta):
+    """Retorna a lista de registros ou None se o JSON estiver malformado"""
+    resposta_limpa = resposta.replace('```json', '').replace('```', '').replace('JSON', '').strip()
+    try:
+        dados = json.loads(resposta_limpa)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(dados, dict):
+        return [dados]
+    return dados if isinstance(dados, list) else None
+
+# Função para validar os registros extraídos
+def validar_registros(dados, colunas_meses):
+    """Retorna a lista de problemas encontrados (vazia se os registros forem válidos)"""
+    if dados is None:
+        return ["JSON malformado"]
+    if not dados:
+        return ["nenhum registro extraído"]
+
+    problemas = []
+    for idx, item in enumerate(dados, start=1):
+        if not isinstance(item, dict):
+            problemas.append(f"registro {idx} não é um objeto")
+            continue
+        nome = str(item.get("Nome do produto") or "").strip()
+        if nome in ["", "NR"]:
+            problemas.append(f"registro {idx} sem 'Nome do produto'")
+        for mes in colunas_meses:
+            valor = str(item.get(mes) or "").strip()
+            if valor not in ["", "NR"] and not PADRAO_VALOR_MES.match(valor):
+                problemas.append(f"registro {idx}: valor inválido em '{mes}': {valor}")
+    return problemas
@@ -0,0 +1,99 @@
+import csv
+import io
+
+import pandas as pd
+import pytest
+
+from banco import (
+    consultar_banco, estado_banco, exportar_alteracoes, localizar_paginas, salvar_no_banco
+)
+from colunas import COLUNAS_EXATAS
+
+
+def linha(nome, **valores):
+    registro = {col: "NR" for col in COLUNAS_EXATAS}
+    registro.update({"Cultura": "Milho", "Nome do produto": nome})
+    registro.update(valores)
+    return registro
+
+
+def df_de(*linhas):
+    return pd.DataFrame(list(linhas), columns=COLUNAS_EXATAS)
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "cultivares.db")
+
+
+def test_linhas_de_uf_diferentes_sao_mantidas(caminho):
+    df = df_de(linha("NS22", UF="PR"), linha("NS22", UF="RS"))
+
+    assert salvar_no_banco(df, "a.pdf", "1", caminho=caminho) == (2, 0)
+    assert len(consultar_banco(caminho=caminho)) == 2
+
+
+def test_correcao_de_mes_atualiza_a_mesma_linha(caminho):
+    salvar_no_banco(df_de(linha("A", **{"Janeiro 1": "60"})), "a.pdf", "1", caminho=caminho)
+    salvar_no_banco(df_de(linha("A", **{"Janeiro 1": "65"})), "a.pdf", "1", caminho=caminho)
+
+    resultado = consultar_banco(prefixo="a", caminho=caminho)
+    assert len(resultado) == 1
+    assert resultado.loc[0, "Janeiro 1"] == "65"
+
+
+def test_nr_nao_sobrescreve_valor_gravado(caminho):
+    salvar_no_banco(df_de(linha("A", Ciclo="Precoce")), "a.pdf", "1", caminho=caminho)
+    salvar_no_banco(df_de(linha("A", Slogan="Forte")), "b.pdf", "2", caminho=caminho)
+
+    resultado = consultar_banco(caminho=caminho)
+    assert resultado.loc[0, "Ciclo"] == "Precoce"
+    assert resultado.loc[0, "Slogan"] == "Forte"
+    assert resultado.loc[0, "Documento de origem"] == "b.pdf"
+
+
+def test_linha_sem_alteracao_nao_muda_de_versao(caminho):
+    df = df_de(linha("A", Ciclo="Precoce"))
+    salvar_no_banco(df, "a.pdf", "1", caminho=caminho)
+
+    assert salvar_no_banco(df, "a.pdf", "1", caminho=caminho) == (0, 0)
+    assert consultar_banco(caminho=caminho).loc[0, "Versão"] == 1
+
+
+def test_alteracao_incrementa_versao(caminho):
+    salvar_no_banco(df_de(linha("A"), linha("B")), "a.pdf", "1", caminho=caminho)
+    salvar_no_banco(df_de(linha("A", Ciclo="Precoce"), linha("B")), "a.pdf", "1", caminho=caminho)
+
+    versoes = consultar_banco(caminho=caminho).set_index("Nome do produto")["Versão"]
+    assert versoes.to_dict() == {"A": 2, "B": 1}
+    assert estado_banco(caminho) == (2, 2, 2)
+
+
+def test_reprocessar_documento_remove_linhas_que_sumiram(caminho):
+    salvar_no_banco(df_de(linha("A"), linha("B")), "a.pdf", "1", caminho=caminho)
+
+    assert salvar_no_banco(df_de(linha("A")), "a.pdf", "1", caminho=caminho) == (0, 1)
+    assert consultar_banco(caminho=caminho)["Nome do produto"].tolist() == ["A"]
+
+
+def test_exportacao_incremental_traz_so_linhas_alteradas(caminho):
+    salvar_no_banco(df_de(linha("A"), linha("B")), "a.pdf", {"A": "3", "B": "4"}, caminho=caminho)
+    primeira = list(csv.reader(io.StringIO(exportar_alteracoes(caminho))))
+    assert [registro[1] for registro in primeira[1:]] == ["A", "B"]
+    assert primeira[0][-2:] == ["Documento de origem", "Páginas"]
+    assert primeira[1][-2:] == ["a.pdf", "3"]
+
+    assert len(list(csv.reader(io.StringIO(exportar_alteracoes(caminho))))) == 1
+
+    salvar_no_banco(df_de(linha("A"), linha("B", Ciclo="Precoce")), "a.pdf", "1", caminho=caminho)
+    segunda = list(csv.reader(io.StringIO(exportar_alteracoes(caminho))))
+    assert [registro[1] for registro in segunda[1:]] == ["B"]
+    assert estado_banco(caminho)[2] == 0
+
+
+def test_localizar_paginas_usa_palavra_inteira():
+    textos = {1: "Híbrido A10 de ciclo precoce", 2: "Tabela do A1 | NR", 3: "Informações"}
+
+    paginas = localizar_paginas(["A1", "A10", "X9"], textos, 3)
+
+    assert paginas == {"A1": "2", "A10": "1", "X9": "1-3"}
@@ -0,0 +1,119 @@
+import json
+import types
+
+import pytest
+
+from roteamento import (
+    carregar_json_estrito, extracao_simples, gerar_com_roteamento,
+    mesclar_metricas, pagina_simples, validar_registros
+)
+
+MESES = ["Janeiro 1", "Janeiro 2"]
+
+
+class ModeloStub:
+    """Modelo local que devolve respostas fixas e conta as chamadas"""
+
+    def __init__(self, model_name, resposta=None, erro=None):
+        self.model_name = model_name
+        self.resposta = resposta
+        self.erro = erro
+        self.chamadas = 0
+
+    def generate_content(self, conteudo):
+        self.chamadas += 1
+        if self.erro:
+            raise self.erro
+        return types.SimpleNamespace(text=self.resposta)
+
+
+def validar(texto):
+    return validar_registros(carregar_json_estrito(texto), MESES)
+
+
+def modelos_stub(resposta_rapido, resposta_forte='[{"Nome do produto": "NS22PRO4", "Janeiro 1": "60-65"}]'):
+    return {
+        "rapido": ModeloStub("lite", resposta_rapido),
+        "forte": ModeloStub("flash", resposta_forte),
+    }
+
+
+def test_caminho_rapido_sem_escalonamento():
+    resposta = json.dumps([{"Nome do produto": "NS66VIP3", "Janeiro 1": "55-60", "Janeiro 2": "NR"}])
+    modelos = modelos_stub(resposta)
+    metricas = {}
+
+    texto, nivel = gerar_com_roteamento("prompt", True, modelos, metricas, validar)
+
+    assert (texto, nivel) == (resposta, "rapido")
+    assert modelos["forte"].chamadas == 0
+    assert metricas["lite"]["chamadas"] == 1
+    assert metricas["lite"]["escalonamentos"] == 0
+
+
+def test_tarefa_complexa_vai_direto_ao_modelo_forte():
+    modelos = modelos_stub("[]")
+    metricas = {}
+
+    _, nivel = gerar_com_roteamento("prompt", False, modelos, metricas, validar)
+
+    assert nivel == "forte"
+    assert modelos["rapido"].chamadas == 0
+    assert "lite" not in metricas
+
+
+@pytest.mark.parametrize("resposta_rapido", [
+    '[{"Nome do produto": "NS22PRO4",',
+    '[{"Nome do produto": "NR", "Janeiro 1": "60-65"}]',
+    '[{"Janeiro 1": "60-65"}]',
+    '[{"Nome do produto": "NS22PRO4", "Janeiro 1": "sessenta"}]',
+])
+def test_escalona_quando_validacao_falha(resposta_rapido):
+    modelos = modelos_stub(resposta_rapido)
+    metricas = {}
+
+    texto, nivel = gerar_com_roteamento("prompt", True, modelos, metricas, validar)
+
+    assert nivel == "forte"
+    assert texto == modelos["forte"].resposta
+    assert metricas["lite"]["chamadas"] == 1
+    assert metricas["lite"]["escalonamentos"] == 1
+    assert metricas["flash"]["chamadas"] == 1
+
+
+def test_escalona_quando_modelo_rapido_falha():
+    modelos = modelos_stub(None)
+    modelos["rapido"].erro = RuntimeError("quota")
+
+    _, nivel = gerar_com_roteamento("prompt", True, modelos, {}, validar)
+
+    assert nivel == "forte"
+
+
+def test_falha_no_modelo_forte_e_propagada_e_registrada():
+    modelos = modelos_stub("nada")
+    modelos["forte"].erro = RuntimeError("indisponível")
+    metricas = {}
+
+    with pytest.raises(RuntimeError):
+        gerar_com_roteamento("prompt", True, modelos, metricas, validar)
+
+    assert metricas["lite"]["escalonamentos"] == 1
+    assert metricas["flash"]["chamadas"] == 1
+
+
+def test_politica_usa_limites_configurados():
+    configuracao = {"densidade_maxima_rapido": 0.1, "caracteres_maximos_rapido": 10}
+
+    assert pagina_simples(0.05, configuracao)
+    assert not pagina_simples(0.2, configuracao)
+    assert extracao_simples("curto", configuracao)
+    assert not extracao_simples("texto longo demais", configuracao)
+
+
+def test_mesclar_metricas_soma_com_sufixo():
+    destino = {"lite (provisório)": {"chamadas": 1, "tempo_total": 0.5, "escalonamentos": 0}}
+
+    mesclar_metricas(destino, {"lite": {"chamadas": 2, "tempo_total": 1.0, "escalonamentos": 0}}, " (provisório)")
+
+    assert destino == {"lite (provisório)": {"chamadas": 3, "tempo_total": 1.5, "escalonamentos": 0}}